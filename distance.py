@@ -0,0 +1,34 @@
+from typing import Protocol
+import math
+import numpy as np
+
+class Distance(Protocol):
+    """Distance metric used to rank drivers against pickups.
+
+    `pairwise` returns a ranking cost that is monotonic in the true distance (so the
+    expensive final step can be skipped for every candidate); `to_distance` converts
+    the winning cost back into the real distance for display and logs. Inputs broadcast,
+    so a column of pickups against a row of drivers yields a (pickups x drivers) matrix.
+    """
+
+    # True when costs are squared distances between planar grid cells. DriverIndex only accepts
+    # planar metrics: its coordinates are int16 cells, and the idle grid and Numba kernel rank by d2
+    planar: bool
+
+    def pairwise(self, src_x, src_y, dst_x, dst_y) -> np.ndarray: ...
+
+    def to_distance(self, cost: float) -> float: ...
+
+class EuclideanL2:
+    """Straight-line distance on the grid; the ranking cost is the squared distance"""
+    planar = True
+
+    def pairwise(self, src_x, src_y, dst_x, dst_y) -> np.ndarray:
+        # Widen small integer coordinates so squares cannot overflow
+        dtype = np.result_type(np.asarray(src_x).dtype, np.int32)
+        dx = np.subtract(src_x, dst_x, dtype=dtype)
+        dy = np.subtract(src_y, dst_y, dtype=dtype)
+        return dx * dx + dy * dy
+
+    def to_distance(self, cost: float) -> float:
+        return math.sqrt(cost)
@@ -0,0 +1,359 @@
+from typing import Dict, Optional, Set, Tuple
+import numpy as np
+from models import DriverState, DriverStatus, Point
+from distance import Distance, EuclideanL2
+
+try:
+    from numba import config, njit, prange
+    HAS_NUMBA = True
+    NUM_THREADS = config.NUMBA_NUM_THREADS
+except ImportError:  # Numba is optional; callers fall back to the NumPy scan
+    HAS_NUMBA = False
+    NUM_THREADS = 1
+    prange = range
+
+# DriverStatus is an IntEnum, so its values are stored directly in the uint8 status column
+IDLE_CODE = int(DriverStatus.IDLE)
+
+# Grid coordinates are small integers, so they are stored as int16 (4 bytes per (x, y)).
+# Squared distances are computed in int32, which is exact for any grid under ~23000 cells a side.
+COORD_DTYPE = np.int16
+DIST_DTYPE = np.int32
+UNAVAILABLE_DISTANCE = np.iinfo(DIST_DTYPE).max
+
+# Grid cells are keyed by a single packed int, (cx << 16) | cy, rather than a tuple: hashing
+# and comparing an int is cheaper and needs no allocation. int16 coordinates keep cx, cy < 2**15.
+CELL_KEY_SHIFT = 16
+
+class IdleDriverGrid:
+    """Uniform grid of available drivers, bucketed by cell, for nearest-neighbour lookups.
+
+    Only idle drivers with spare queue capacity are stored. Membership is updated in
+    O(1) whenever a driver's status, pending count or cell changes, and queries scan
+    rings of cells outwards from the pickup. Each driver also carries its creation
+    sequence, so equally close drivers resolve to the earliest-created one whatever
+    the set iteration order.
+    """
+
+    def __init__(self, cell: int = 10):
+        self.cell = cell
+        self.cells: Dict[int, Set[str]] = {}
+        self.positions: Dict[str, Tuple[int, int, int]] = {}  # driver_id -> (x, y, seq)
+
+    def _key(self, x: int, y: int) -> int:
+        """Packed key of the cell containing (x, y)"""
+        return ((x // self.cell) << CELL_KEY_SHIFT) | (y // self.cell)
+
+    def place(self, driver_id: str, x: int, y: int, seq: int, available: bool):
+        """Record a driver's position, bucketing it only while it is available"""
+        old = self.positions.get(driver_id)
+        if old is not None:
+            if available and self._key(old[0], old[1]) == self._key(x, y):
+                self.positions[driver_id] = (x, y, seq)
+                return
+            self.discard(driver_id)
+        if available:
+            self.positions[driver_id] = (x, y, seq)
+            self.cells.setdefault(self._key(x, y), set()).add(driver_id)
+
+    def discard(self, driver_id: str):
+        """Remove a driver from the grid if present"""
+        old = self.positions.pop(driver_id, None)
+        if old is None:
+            return
+        key = self._key(old[0], old[1])
+        bucket = self.cells[key]
+        bucket.discard(driver_id)
+        if not bucket:
+            del self.cells[key]
+
+    def clear(self):
+        self.cells.clear()
+        self.positions.clear()
+
+    def _ring(self, cx: int, cy: int, r: int):
+        """Yield the occupied cells at Chebyshev distance r from (cx, cy)"""
+        if r == 0:
+            candidates = [(cx, cy)]
+        else:
+            candidates = [(cx + dx, cy + dy) for dx in range(-r, r + 1) for dy in (-r, r)]
+            candidates += [(cx + dx, cy + dy) for dx in (-r, r) for dy in range(-r + 1, r)]
+        cells = self.cells
+        for kx, ky in candidates:
+            # Coordinates are never negative, so cells off the low edge are always empty
+            if kx < 0 or ky < 0:
+                continue
+            bucket = cells.get((kx << CELL_KEY_SHIFT) | ky)
+            if bucket:
+                yield bucket
+
+    def nearest(self, px: int, py: int, exclude_drivers: Set[str]) -> Optional[Tuple[str, int]]:
+        """Closest available driver as (driver_id, squared_distance), or None.
+
+        Rings are expanded until no unvisited cell can hold a driver closer than the
+        best found, or every occupied cell has been visited. Ties go to the
+        earliest-created driver.
+        """
+        cell = self.cell
+        cx, cy = px // cell, py // cell
+        positions = self.positions
+        # Occupied cells not yet visited; once all are seen there is nothing further out
+        unvisited = len(self.cells)
+        best_id, best_d2, best_seq = None, 0, 0
+        r = 0
+        while unvisited:
+            for bucket in self._ring(cx, cy, r):
+                unvisited -= 1
+                for driver_id in bucket:
+                    if driver_id in exclude_drivers:
+                        continue
+                    x, y, seq = positions[driver_id]
+                    d2 = (x - px) * (x - px) + (y - py) * (y - py)
+                    if best_id is None or d2 < best_d2 or (d2 == best_d2 and seq < best_seq):
+                        best_id, best_d2, best_seq = driver_id, d2, seq
+            # Any driver in ring r + 1 or beyond is at least r * cell + 1 away on some axis;
+            # one exactly that far could still win a tie, so stop only when strictly closer
+            bound = r * cell + 1
+            if best_id is not None and best_d2 < bound * bound:
+                break
+            r += 1
+        return (best_id, best_d2) if best_id is not None else None
+
+class DriverIndex:
+    """Structure-of-Arrays cache of driver state used by the dispatch hot path.
+
+    Rows are kept dense: removing a driver moves the last row into the freed slot,
+    so the first `size` entries of every array are always valid. Unless `grid_cell`
+    is None, idle drivers with fewer than `max_requests` pending rides are also
+    tracked in an IdleDriverGrid. Coordinates are integer grid cells, so `metric`
+    must be planar.
+
+    Drivers on a ride also carry their current target (pickup, then dropoff) and
+    ride id in the `tx`/`ty`/`moving`/`ride_ids` columns, so a tick can move every
+    one of them without walking the rides.
+
+    Rows are not in creation order once a driver has been removed, so each row keeps
+    its creation sequence in `seq`; every nearest-driver path breaks distance ties on it.
+    """
+
+    def __init__(self, capacity: int = 64, grid_cell: Optional[int] = 10, metric: Optional[Distance] = None,
+                 max_requests: int = 5):
+        self.metric = metric or EuclideanL2()
+        if not self.metric.planar:
+            raise ValueError(f"{type(self.metric).__name__} is not a planar metric; driver coordinates are grid cells")
+        self.size = 0
+        self.max_requests = max_requests
+        self.grid = IdleDriverGrid(grid_cell) if grid_cell else None
+        self.xs = np.empty(capacity, dtype=COORD_DTYPE)
+        self.ys = np.empty(capacity, dtype=COORD_DTYPE)
+        self.status = np.empty(capacity, dtype=np.uint8)
+        self.pending = np.empty(capacity, dtype=np.int32)
+        self.ids = np.empty(capacity, dtype=object)
+        self.tx = np.empty(capacity, dtype=COORD_DTYPE)
+        self.ty = np.empty(capacity, dtype=COORD_DTYPE)
+        self.moving = np.zeros(capacity, dtype=bool)
+        self.ride_ids = np.empty(capacity, dtype=object)
+        self.seq = np.empty(capacity, dtype=np.int64)
+        self._next_seq = 0
+        self.id_to_row: Dict[str, int] = {}
+        # Scratch buffers reused by squared_distances() so lookups don't allocate
+        self._dx = np.empty(capacity, dtype=DIST_DTYPE)
+        self._d2 = np.empty(capacity, dtype=DIST_DTYPE)
+        self._excluded = np.empty(capacity, dtype=bool)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _grow(self):
+        """Double the capacity of every column"""
+        capacity = max(1, 2 * len(self.xs))
+        for name in ("xs", "ys", "status", "pending", "ids", "tx", "ty", "moving", "ride_ids", "seq"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+        self._dx = np.empty(capacity, dtype=DIST_DTYPE)
+        self._d2 = np.empty(capacity, dtype=DIST_DTYPE)
+        self._excluded = np.empty(capacity, dtype=bool)
+
+    def _write(self, row: int, driver: DriverState):
+        self.xs[row] = driver.location.x
+        self.ys[row] = driver.location.y
+        self.status[row] = driver.status
+        self._set_pending(row, driver)
+
+    def _set_pending(self, row: int, driver: DriverState):
+        """Write a driver's pending count and refresh its grid membership"""
+        pending = len(driver.pending_requests)
+        self.pending[row] = pending
+        if self.grid is not None:
+            available = driver.status == DriverStatus.IDLE and pending < self.max_requests
+            self.grid.place(driver.id, driver.location.x, driver.location.y, int(self.seq[row]), available)
+
+    def add(self, driver: DriverState):
+        """Append a row for a newly created driver"""
+        if self.size == len(self.xs):
+            self._grow()
+        row = self.size
+        self.ids[row] = driver.id
+        self.moving[row] = False
+        self.ride_ids[row] = None
+        self.seq[row] = self._next_seq
+        self._next_seq += 1
+        self.id_to_row[driver.id] = row
+        self.size += 1
+        self._write(row, driver)
+
+    def update(self, driver: DriverState):
+        """Re-sync a driver's row after its location, status or pending queue changed"""
+        self._write(self.id_to_row[driver.id], driver)
+
+    def add_request(self, driver: DriverState, ride_id: str):
+        """Queue a ride on a driver and write the new pending count through to its row"""
+        driver.pending_requests[ride_id] = None
+        self._set_pending(self.id_to_row[driver.id], driver)
+
+    def remove_request(self, driver: DriverState, ride_id: str):
+        """Drop a ride from a driver's queue (if present) and write the count through"""
+        if ride_id in driver.pending_requests:
+            del driver.pending_requests[ride_id]
+            self._set_pending(self.id_to_row[driver.id], driver)
+
+    def clear_requests(self, driver: DriverState) -> Dict[str, None]:
+        """Empty a driver's pending queue, handing back the old queue instead of copying it"""
+        queued = driver.pending_requests
+        driver.pending_requests = {}
+        self._set_pending(self.id_to_row[driver.id], driver)
+        return queued
+
+    def set_target(self, driver: DriverState, ride_id: str, target: Point):
+        """Start moving a driver towards `target` on behalf of a ride"""
+        row = self.id_to_row[driver.id]
+        self.tx[row] = target.x
+        self.ty[row] = target.y
+        self.moving[row] = True
+        self.ride_ids[row] = ride_id
+
+    def clear_target(self, driver: DriverState):
+        """Stop moving a driver once its ride is over"""
+        row = self.id_to_row[driver.id]
+        self.moving[row] = False
+        self.ride_ids[row] = None
+
+    def remove(self, driver_id: str):
+        """Drop a driver's row, filling the hole with the last row"""
+        row = self.id_to_row.pop(driver_id)
+        last = self.size - 1
+        if row != last:
+            self.xs[row] = self.xs[last]
+            self.ys[row] = self.ys[last]
+            self.status[row] = self.status[last]
+            self.pending[row] = self.pending[last]
+            self.tx[row] = self.tx[last]
+            self.ty[row] = self.ty[last]
+            self.moving[row] = self.moving[last]
+            self.ride_ids[row] = self.ride_ids[last]
+            self.seq[row] = self.seq[last]
+            moved_id = self.ids[last]
+            self.ids[row] = moved_id
+            self.id_to_row[moved_id] = row
+        self.ids[last] = None
+        self.ride_ids[last] = None
+        self.size = last
+        if self.grid is not None:
+            self.grid.discard(driver_id)
+
+    def argmin(self, costs: np.ndarray) -> int:
+        """Row with the lowest cost, ties going to the earliest-created driver"""
+        row = int(np.argmin(costs))
+        ties = np.flatnonzero(costs == costs[row])
+        if ties.size > 1:
+            row = int(ties[np.argmin(self.seq[ties])])
+        return row
+
+    def excluded_mask(self, driver_ids) -> np.ndarray:
+        """Boolean mask over the rows, True for the given driver ids.
+        
+        Ids of drivers no longer in the index are ignored. The returned view is
+        only valid until the next call.
+        """
+        mask = self._excluded[:self.size]
+        mask.fill(False)
+        for driver_id in driver_ids:
+            row = self.id_to_row.get(driver_id)
+            if row is not None:
+                mask[row] = True
+        return mask
+
+    def available_mask(self, max_driver_requests: int, excluded_mask: np.ndarray) -> np.ndarray:
+        """Boolean mask over the rows of idle, non-excluded drivers with spare capacity"""
+        n = self.size
+        return (self.status[:n] == IDLE_CODE) & (self.pending[:n] < max_driver_requests) & ~excluded_mask
+
+    def squared_distances(self, px: float, py: float) -> np.ndarray:
+        """Squared distance from (px, py) to every row, written into a reused scratch buffer.
+        
+        The returned view is only valid until the next call.
+        """
+        n = self.size
+        dx, d2 = self._dx[:n], self._d2[:n]
+        np.subtract(self.xs[:n], px, out=dx, dtype=DIST_DTYPE)
+        np.multiply(dx, dx, out=dx)
+        np.subtract(self.ys[:n], py, out=d2, dtype=DIST_DTYPE)
+        np.multiply(d2, d2, out=d2)
+        np.add(d2, dx, out=d2)
+        return d2
+
+    def distances(self, px: float, py: float) -> np.ndarray:
+        """Ranking cost from (px, py) to every row under the index's metric"""
+        return self.squared_distances(px, py)
+
+    def clear(self):
+        """Remove every row"""
+        self.ids[:self.size] = None
+        self.ride_ids[:self.size] = None
+        self.id_to_row.clear()
+        self.size = 0
+        if self.grid is not None:
+            self.grid.clear()
+
+def _nearest_idle(xs, ys, status, pending, seq, excluded_mask, px, py, max_req) -> Tuple[int, int]:
+    """Return (row, squared_distance) of the closest idle driver with spare capacity, or (-1, 0).
+    
+    Rows are split into one chunk per thread; each chunk keeps a local best that is
+    reduced afterwards. Ties resolve to the lowest `seq` (earliest-created driver),
+    like DriverIndex.argmin.
+    """
+    n = xs.shape[0]
+    n_chunks = max(1, min(n, NUM_THREADS))
+    chunk_rows = np.full(n_chunks, -1, dtype=np.int64)
+    chunk_d2 = np.zeros(n_chunks, dtype=np.int64)
+    for c in prange(n_chunks):
+        best_row = -1
+        best_d2 = 0
+        for i in range(c * n // n_chunks, (c + 1) * n // n_chunks):
+            if status[i] != IDLE_CODE or pending[i] >= max_req or excluded_mask[i]:
+                continue
+            dx = np.int64(xs[i]) - px
+            dy = np.int64(ys[i]) - py
+            d2 = dx * dx + dy * dy
+            if best_row < 0 or d2 < best_d2 or (d2 == best_d2 and seq[i] < seq[best_row]):
+                best_row = i
+                best_d2 = d2
+        chunk_rows[c] = best_row
+        chunk_d2[c] = best_d2
+    
+    best_row = -1
+    best_d2 = 0
+    for c in range(n_chunks):
+        row = chunk_rows[c]
+        if row < 0:
+            continue
+        if best_row < 0 or chunk_d2[c] < best_d2 or (chunk_d2[c] == best_d2 and seq[row] < seq[best_row]):
+            best_row = row
+            best_d2 = chunk_d2[c]
+    return best_row, best_d2
+
+if HAS_NUMBA:
+    # The original Python function stays reachable as `nearest_idle.py_func` for debugging
+    nearest_idle = njit(parallel=True, fastmath=True, cache=True)(_nearest_idle)
@@ -1,63 +1,123 @@
-from typing import List, Set
-import math
-from models import Location, Driver, DriverStatus
-
-def calculate_euclidean_distance(location1: Location, location2: Location) -> float:
-    """Calculate Euclidean distance between two locations"""
-    return math.sqrt((location2.x - location1.x) ** 2 + (location2.y - location1.y) ** 2)
-
-def find_available_drivers(drivers: dict, pickup_location: Location, exclude_drivers: Set[str] = None, max_driver_requests: int = 5) -> List[tuple]:
-    """Find all available drivers sorted by distance to pickup location"""
-    if exclude_drivers is None:
-        exclude_drivers = set()
-    
-    available_drivers = []
-    for driver_id, driver in drivers.items():
-        if (driver_id not in exclude_drivers and 
-            driver.status == DriverStatus.IDLE and 
-            len(driver.pending_requests) < max_driver_requests):
-            distance = calculate_euclidean_distance(driver.location, pickup_location)
-            available_drivers.append((driver_id, distance))
-    
-    # Sort by distance (closest first)
-    available_drivers.sort(key=lambda x: x[1])
-    return available_drivers
-
-def send_request_to_next_driver(ride_request, drivers: dict, ride_requests: dict, max_driver_requests: int = 5):
-    """Send ride request to the next closest available driver"""
-    exclude_drivers = set(ride_request.rejected_by)
-    available_drivers = find_available_drivers(drivers, ride_request.pickup_location, exclude_drivers, max_driver_requests)
-    
-    if available_drivers:
-        next_driver_id, distance = available_drivers[0]
+from typing import Counter, FrozenSet, Optional, Set, Tuple
+import logging
+import numpy as np
+from models import Point, RideStatus
+from driver_index import DriverIndex, HAS_NUMBA, DIST_DTYPE, UNAVAILABLE_DISTANCE
+
+if HAS_NUMBA:
+    from driver_index import nearest_idle
+
+logger = logging.getLogger("dispatch")
+
+# Shared empty exclusion set, so lookups without exclusions don't allocate one
+NO_EXCLUSIONS: FrozenSet[str] = frozenset()
+
+def transition(counts: Counter, old_status, new_status):
+    """Move one entity between buckets of a live per-status count"""
+    counts[old_status] -= 1
+    counts[new_status] += 1
+
+def pick_nearest_available(driver_index: DriverIndex, pickup_location: Point, exclude_drivers: Set[str] = None, max_driver_requests: int = 5) -> Optional[Tuple[str, int]]:
+    """Closest available driver as (driver_id, squared_distance), or None.
+    
+    Filtering, distance and selection happen in a single pass; no candidate list is built.
+    """
+    # Only the grid cells around the pickup are visited; the grid holds drivers available under the index's limit
+    if driver_index.grid is not None and max_driver_requests == driver_index.max_requests:
+        return driver_index.grid.nearest(pickup_location.x, pickup_location.y, exclude_drivers or NO_EXCLUSIONS)
+    
+    n = driver_index.size
+    excluded_mask = driver_index.excluded_mask(exclude_drivers or NO_EXCLUSIONS)
+    
+    # One compiled pass over the arrays, no masking temporaries
+    if HAS_NUMBA:
+        row, d2 = nearest_idle(driver_index.xs[:n], driver_index.ys[:n], driver_index.status[:n],
+                               driver_index.pending[:n], driver_index.seq[:n], excluded_mask,
+                               pickup_location.x, pickup_location.y, max_driver_requests)
+        return (driver_index.ids[row], int(d2)) if row >= 0 else None
+    
+    # Blend unavailable rows to the max distance and take one argmin instead of compacting the arrays
+    d2 = driver_index.distances(pickup_location.x, pickup_location.y)
+    np.copyto(d2, UNAVAILABLE_DISTANCE, where=~driver_index.available_mask(max_driver_requests, excluded_mask))
+    row = driver_index.argmin(d2) if n else 0
+    return (driver_index.ids[row], d2[row].item()) if n and d2[row] != UNAVAILABLE_DISTANCE else None
+
+def assign_ride(ride_request, nearest: Optional[Tuple[str, int]], drivers: dict, driver_index: DriverIndex):
+    """Queue a ride on the chosen (driver_id, squared_distance), or reject it when there is none.
+    
+    Returns True if the ride was queued on a driver.
+    """
+    ride_request.version += 1
+    if nearest is not None:
+        next_driver_id, squared_distance = nearest
         driver = drivers[next_driver_id]
         
         # Add request to driver's pending queue
-        driver.pending_requests.append(ride_request.id)
+        driver_index.add_request(driver, ride_request.id)
         ride_request.assigned_driver_id = next_driver_id
         
-        print(f"[REQUEST_ROUTING] Ride {ride_request.id[:8]} sent to driver {next_driver_id[:8]} (distance: {distance:.2f})")
-        print(f"[REQUEST_ROUTING] Driver {next_driver_id[:8]} now has {len(driver.pending_requests)} pending requests")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[REQUEST_ROUTING] Ride %s sent to driver %s (distance: %.2f)",
+                         ride_request.short_id, driver.short_id, driver_index.metric.to_distance(squared_distance))
+            logger.debug("[REQUEST_ROUTING] Driver %s now has %d pending requests",
+                         driver.short_id, len(driver.pending_requests))
+        return True
     else:
         # No available drivers
-        ride_request.status = "rejected"
+        ride_request.status = RideStatus.REJECTED
         ride_request.assigned_driver_id = None
-        print(f"[REQUEST_ROUTING] No available drivers for ride {ride_request.id[:8]}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[REQUEST_ROUTING] No available drivers for ride %s", ride_request.short_id)
+        return False
 
-def move_driver_towards_location(driver: Driver, target_location: Location):
-    """Move driver one step towards the target location"""
-    old_location = (driver.location.x, driver.location.y)
+def send_request_to_next_driver(ride_request, drivers: dict, driver_index: DriverIndex, ride_requests: dict, max_driver_requests: int = 5):
+    """Send ride request to the next closest available driver; returns False if it was rejected instead"""
+    nearest = pick_nearest_available(driver_index, ride_request.pickup_location, ride_request.rejected_by, max_driver_requests)
+    return assign_ride(ride_request, nearest, drivers, driver_index)
+
+def batch_assign(ride_batch: list, drivers: dict, driver_index: DriverIndex, max_driver_requests: int = 5):
+    """Assign a batch of ride requests to their closest available drivers, in order.
+    
+    Each ride skips the drivers in its own `rejected_by` and sees the pending counts left
+    by the rides before it. With the grid each ride is a local ring search; without it,
+    distances for the whole batch come from one (rides x drivers) NumPy pass and each ride
+    takes an argmin over the rows still available.
+    """
+    if driver_index.grid is not None or len(ride_batch) == 1:
+        for ride_request in ride_batch:
+            nearest = pick_nearest_available(driver_index, ride_request.pickup_location, ride_request.rejected_by, max_driver_requests)
+            assign_ride(ride_request, nearest, drivers, driver_index)
+        return
     
-    # Move one step towards target
-    if driver.location.x < target_location.x:
-        driver.location.x += 1
-    elif driver.location.x > target_location.x:
-        driver.location.x -= 1
+    n = driver_index.size
+    px = np.array([r.pickup_location.x for r in ride_batch], dtype=DIST_DTYPE)[:, None]
+    py = np.array([r.pickup_location.y for r in ride_batch], dtype=DIST_DTYPE)[:, None]
+    d2 = driver_index.metric.pairwise(px, py, driver_index.xs[:n], driver_index.ys[:n])
+    available = driver_index.available_mask(max_driver_requests, driver_index.excluded_mask(NO_EXCLUSIONS))
     
-    if driver.location.y < target_location.y:
-        driver.location.y += 1
-    elif driver.location.y > target_location.y:
-        driver.location.y -= 1
+    for i, ride_request in enumerate(ride_batch):
+        mask = available
+        if ride_request.rejected_by:
+            mask = available & ~driver_index.excluded_mask(ride_request.rejected_by)
+        ride_d2 = np.where(mask, d2[i], UNAVAILABLE_DISTANCE)
+        row = driver_index.argmin(ride_d2) if n else 0
+        if n and mask[row]:
+            assign_ride(ride_request, (driver_index.ids[row], ride_d2[row].item()), drivers, driver_index)
+            if driver_index.pending[row] >= max_driver_requests:
+                available[row] = False
+        else:
+            assign_ride(ride_request, None, drivers, driver_index)
+
+def move_all_drivers_towards(driver_index: DriverIndex, targets_x: np.ndarray, targets_y: np.ndarray, active_mask: np.ndarray) -> np.ndarray:
+    """Move every active driver row one step towards its target in one vectorized pass.
     
-    print(f"[MOVEMENT] Driver moved from {old_location} to ({driver.location.x}, {driver.location.y})")
-    return driver.location.x == target_location.x and driver.location.y == target_location.y 
\ No newline at end of file
+    Targets and mask are aligned with the index rows. Only `driver_index` is updated;
+    callers write positions back to the driver states they need. Returns a mask of
+    active rows now at their target.
+    """
+    n = driver_index.size
+    xs = driver_index.xs[:n]
+    ys = driver_index.ys[:n]
+    np.add(xs, np.sign(targets_x - xs).astype(xs.dtype), out=xs, where=active_mask)
+    np.add(ys, np.sign(targets_y - ys).astype(ys.dtype), out=ys, where=active_mask)
+    return active_mask & (xs == targets_x) & (ys == targets_y)
@@ -1,15 +1,42 @@
+import logging
+import re
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from routes import router
 
-app = FastAPI(title="Ride Dispatch System")
+# Dispatch logging is debug-level; keep it off unless explicitly enabled
+logging.basicConfig(level=logging.WARNING)
+
+# Matches content-hashed asset names such as app.3f9a1c2b.js
+HASHED_ASSET = re.compile(r"\.[0-9a-f]{8,}\.[^./]+$")
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles that adds Cache-Control on top of Starlette's ETag/304 handling.
+
+    Content-hashed assets can be cached forever; anything else is revalidated
+    with the ETag on each use, so clients get a 304 instead of the full body.
+    """
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if HASHED_ASSET.search(str(full_path)):
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        else:
+            response.headers["Cache-Control"] = "no-cache"
+        return response
+
+# orjson serializes responses several times faster than the stdlib json encoder
+app = FastAPI(title="Ride Dispatch System", default_response_class=ORJSONResponse)
 
 # Mount static files for frontend
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", CachedStaticFiles(directory="static"), name="static")
 
 # Include all routes
 app.include_router(router)
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
+    # All state lives in this process's memory, so run a single worker. "auto" picks
+    # uvloop and httptools (installed via uvicorn[standard]) and falls back where unavailable.
+    uvicorn.run(app, host="0.0.0.0", port=8000, workers=1, loop="auto", http="auto", log_level="warning") 
\ No newline at end of file
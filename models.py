@@ -1,13 +1,34 @@
-from pydantic import BaseModel
-from typing import List, Optional
-from enum import Enum
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field, PlainSerializer
+from typing import Annotated, Dict, List, Optional, Set
+from dataclasses import dataclass, field
+from enum import Enum, IntEnum
 
 # Enums
-class DriverStatus(str, Enum):
-    IDLE = "idle"
-    GOING_TO_PICKUP = "going_to_pickup"
-    DRIVING_TO_DEST = "driving_to_dest"
-    BUSY = "busy"
+class _LowercaseName:
+    """Enum mixin that prints members as their lowercase name, e.g. in f-strings and log lines"""
+
+    def __str__(self) -> str:
+        return self.name.lower()
+
+    def __format__(self, format_spec: str) -> str:
+        return format(str(self), format_spec)
+
+class DriverStatus(_LowercaseName, IntEnum):
+    """Driver status as a small int so hot-path compares and the SoA cache use plain integers.
+    
+    On the wire it is still the lowercase name (e.g. "idle").
+    """
+    IDLE = 0
+    GOING_TO_PICKUP = 1
+    DRIVING_TO_DEST = 2
+    BUSY = 3
+
+class RideStatus(_LowercaseName, IntEnum):
+    """Ride status as a small int, serialized as its lowercase name like DriverStatus"""
+    PENDING = 0
+    ACCEPTED = 1
+    COMPLETED = 2
+    REJECTED = 3
 
 class RiderStatus(str, Enum):
     WAITING = "waiting"
@@ -15,19 +36,87 @@ class RiderStatus(str, Enum):
     IN_TRANSIT = "in_transit"
     COMPLETED = "completed"
 
+def _wire_enum(enum_cls):
+    """Annotated IntEnum that is serialized as, and also accepts, its lowercase member name"""
+    return Annotated[
+        enum_cls,
+        BeforeValidator(lambda v: enum_cls.__members__.get(v.upper(), v) if isinstance(v, str) else v),
+        PlainSerializer(lambda v: v.name.lower(), return_type=str),
+    ]
+
+DriverStatusField = _wire_enum(DriverStatus)
+RideStatusField = _wire_enum(RideStatus)
+
+# Id collections are sets / ordered dicts internally and plain lists on the wire
+IdList = Annotated[List[str], BeforeValidator(list)]
+
+# Internal state. Endpoints and the dispatch code mutate these in place, so they are
+# slotted dataclasses (no per-assignment validation, no instance __dict__); the pydantic
+# models below are only used to parse requests and serialize responses.
+# `short_id` is the 8-character id prefix used in log lines, computed once per object.
+@dataclass(slots=True)
+class Point:
+    x: int
+    y: int
+
+@dataclass(slots=True)
+class DriverState:
+    id: str
+    location: Point
+    status: DriverStatus
+    pending_requests: Dict[str, None] = field(default_factory=dict)  # Ride request IDs in arrival order (ordered set)
+    current_ride_id: Optional[str] = None
+    short_id: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.short_id = self.id[:8]
+
+@dataclass(slots=True)
+class RiderState:
+    id: str
+    pickup_location: Point
+    dropoff_location: Point
+    status: RiderStatus
+    current_ride_id: Optional[str] = None
+    short_id: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.short_id = self.id[:8]
+
+@dataclass(slots=True)
+class RideState:
+    id: str
+    rider_id: str
+    pickup_location: Point
+    dropoff_location: Point
+    status: RideStatus
+    assigned_driver_id: Optional[str] = None
+    rejected_by: Set[str] = field(default_factory=set)  # Driver IDs who rejected this request
+    version: int = 0  # Bumped on every assignment or status change, for optimistic responses
+    short_id: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.short_id = self.id[:8]
+
 # Models
 class Location(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     x: int
     y: int
 
 class Driver(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: str
     location: Location
-    status: DriverStatus
-    pending_requests: List[str] = []  # List of ride request IDs
+    status: DriverStatusField
+    pending_requests: IdList = Field(default_factory=list)  # Ride request IDs in arrival order
     current_ride_id: Optional[str] = None
 
 class Rider(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: str
     pickup_location: Location
     dropoff_location: Location
@@ -35,17 +124,21 @@ class Rider(BaseModel):
     current_ride_id: Optional[str] = None
 
 class RideRequest(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: str
     rider_id: str
     pickup_location: Location
     dropoff_location: Location
-    status: str  # "pending", "accepted", "rejected", "completed"
+    status: RideStatusField
     assigned_driver_id: Optional[str] = None
-    rejected_by: List[str] = []  # List of driver IDs who rejected this request
+    rejected_by: IdList = []  # List of driver IDs who rejected this request
+    version: int = 0
 
 class RideRequestCreate(BaseModel):
     rider_id: str
 
 class DriverResponse(BaseModel):
     action: str  # "accept" or "reject"
-    ride_id: str 
\ No newline at end of file
+    ride_id: str
+    version: Optional[int] = None  # Ride version the driver saw; a stale one is refused with 409 
\ No newline at end of file
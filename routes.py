@@ -1,21 +1,163 @@
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict
-import uuid
+from fastapi import APIRouter, HTTPException, Response
+from typing import Counter, List, Dict, Optional
+import asyncio
+import collections
+import itertools
+import logging
+import numpy as np
+import orjson
 from models import (
     Location, Driver, Rider, RideRequest, RideRequestCreate, 
-    DriverResponse, DriverStatus, RiderStatus
+    DriverResponse, DriverStatus, RiderStatus, RideStatus,
+    Point, DriverState, RiderState, RideState
 )
-from helpers import find_available_drivers, send_request_to_next_driver, move_driver_towards_location
+from helpers import batch_assign, send_request_to_next_driver, move_all_drivers_towards, transition
+from driver_index import DriverIndex
 
 # Global state (in-memory storage)
-drivers: Dict[str, Driver] = {}
-riders: Dict[str, Rider] = {}
-ride_requests: Dict[str, RideRequest] = {}
+drivers: Dict[str, DriverState] = {}
+riders: Dict[str, RiderState] = {}
+ride_requests: Dict[str, RideState] = {}  # Pending and accepted rides
+# Every ride ever requested, in creation order, as served by /rides and /state. Finished rides
+# stay here as RideState and are serialized on read; the history is never trimmed, so it grows
+# by one entry per ride requested until /clear-state.
+ride_history: Dict[str, RideState] = {}
+# Live per-status counts, updated on every transition so /state doesn't rescan every entity
+driver_counts: Counter = collections.Counter()
+rider_counts: Counter = collections.Counter()
+ride_counts: Counter = collections.Counter()
+# Serialized /state body, reused until the next mutation; None means it must be rebuilt
+state_json: Optional[bytes] = None
+# Ids are sequential per entity type; they are never reset, so ids stay unique across /clear-state
+_driver_ids = itertools.count(1)
+_rider_ids = itertools.count(1)
+_ride_ids = itertools.count(1)
 current_tick = 0
 GRID_SIZE = 100
+GRID_MAX = GRID_SIZE - 1
 MAX_DRIVER_REQUESTS = 5
+driver_index = DriverIndex(max_requests=MAX_DRIVER_REQUESTS)  # SoA mirror of `drivers` for dispatch lookups
+DISPATCH_BATCH_SIZE = 64
+
+# New ride requests are queued and assigned by a single dispatcher task per event loop
+dispatch_queue: Optional[asyncio.Queue] = None
+_dispatcher_loop: Optional[asyncio.AbstractEventLoop] = None
+_dispatcher_task: Optional[asyncio.Task] = None
 
 router = APIRouter()
+logger = logging.getLogger("dispatch")
+
+def _dispatch_batch(batch: list):
+    """Assign one batch of queued (ride, future) pairs and resolve their futures"""
+    # Rides dropped by /clear-state while queued are no longer live, so they are left out
+    rides = [ride for ride, _ in batch if ride_requests.get(ride.id) is ride]
+    try:
+        batch_assign(rides, drivers, driver_index, MAX_DRIVER_REQUESTS)
+    except Exception:
+        # Rides the failed batch never reached would stay pending with no driver; reject them
+        for ride in rides:
+            if ride.status == RideStatus.PENDING and ride.assigned_driver_id is None:
+                ride.status = RideStatus.REJECTED
+        raise
+    finally:
+        invalidate_state()
+        _finish_rejected(rides)
+    for _, done in batch:
+        if not done.done():
+            done.set_result(None)
+
+async def dispatcher(queue: asyncio.Queue):
+    """Drain queued ride requests and assign them to drivers in batches"""
+    while True:
+        batch = [await queue.get()]
+        while not queue.empty() and len(batch) < DISPATCH_BATCH_SIZE:
+            batch.append(queue.get_nowait())
+        # A failure only fails this batch's requests; the task has to keep serving the queue
+        try:
+            _dispatch_batch(batch)
+        except Exception as e:
+            logger.exception("[DISPATCH] Failed to assign a batch of %d rides", len(batch))
+            for _, done in batch:
+                if not done.done():
+                    done.set_exception(e)
+
+def invalidate_state():
+    """Drop the cached /state body; call after any change to drivers, riders, rides or the tick"""
+    global state_json
+    state_json = None
+
+def _in_bounds(p: Location) -> bool:
+    """Whether a location lies on the grid"""
+    return 0 <= p.x <= GRID_MAX and 0 <= p.y <= GRID_MAX
+
+def _archive(ride: RideState):
+    """Drop a finished ride from the live dict; it stays in the history"""
+    ride_requests.pop(ride.id, None)
+
+def _finish_rejected(rides):
+    """Count and archive dispatched rides that found no driver"""
+    for ride in rides:
+        if ride.status == RideStatus.REJECTED:
+            transition(ride_counts, RideStatus.PENDING, RideStatus.REJECTED)
+            _archive(ride)
+
+# The *_json helpers build the wire form straight from the state dataclasses, matching
+# the Driver/Rider/RideRequest response models field for field without validating
+def _point_json(point: Point) -> dict:
+    return {"x": point.x, "y": point.y}
+
+def _driver_json(driver: DriverState) -> dict:
+    """JSON-ready dict for a driver"""
+    return {
+        "id": driver.id,
+        "location": _point_json(driver.location),
+        "status": driver.status.name.lower(),
+        "pending_requests": list(driver.pending_requests),
+        "current_ride_id": driver.current_ride_id
+    }
+
+def _rider_json(rider: RiderState) -> dict:
+    """JSON-ready dict for a rider"""
+    return {
+        "id": rider.id,
+        "pickup_location": _point_json(rider.pickup_location),
+        "dropoff_location": _point_json(rider.dropoff_location),
+        "status": rider.status.value,
+        "current_ride_id": rider.current_ride_id
+    }
+
+def _ride_json(ride: RideState) -> dict:
+    """JSON-ready dict for a ride"""
+    return {
+        "id": ride.id,
+        "rider_id": ride.rider_id,
+        "pickup_location": _point_json(ride.pickup_location),
+        "dropoff_location": _point_json(ride.dropoff_location),
+        "status": ride.status.name.lower(),
+        "assigned_driver_id": ride.assigned_driver_id,
+        "rejected_by": list(ride.rejected_by),
+        "version": ride.version
+    }
+
+def _rides_json() -> list:
+    """JSON-ready dicts for every ride, in creation order"""
+    return [*map(_ride_json, ride_history.values())]
+
+def _json_response(content) -> Response:
+    """Encode already JSON-ready content with orjson, bypassing FastAPI's response_model pass"""
+    return Response(content=orjson.dumps(content), media_type="application/json")
+
+async def dispatch_ride(ride_request: RideState):
+    """Queue a new ride for the dispatcher and wait until it has been assigned or rejected"""
+    global dispatch_queue, _dispatcher_loop, _dispatcher_task
+    loop = asyncio.get_running_loop()
+    if _dispatcher_loop is not loop:
+        dispatch_queue = asyncio.Queue()
+        _dispatcher_loop = loop
+        _dispatcher_task = loop.create_task(dispatcher(dispatch_queue))
+    done = loop.create_future()
+    dispatch_queue.put_nowait((ride_request, done))
+    await done
 
 @router.get("/")
 async def read_root():
@@ -26,468 +168,480 @@ async def read_root():
 @router.post("/drivers", response_model=Driver)
 async def create_driver(location: Location):
     """Create a new driver at the specified location"""
-    try:
-        print(f"[DRIVER_CREATE] Starting driver creation at location: {location}")
-        
-        # Validate location coordinates
-        if location.x < 0 or location.y < 0 or location.x >= GRID_SIZE or location.y >= GRID_SIZE:
-            error_msg = f"Invalid location coordinates: ({location.x}, {location.y}). Grid size is {GRID_SIZE}x{GRID_SIZE}"
-            print(f"[DRIVER_CREATE] ERROR: {error_msg}")
-            raise HTTPException(status_code=400, detail=error_msg)
-        
-        driver_id = str(uuid.uuid4())
-        print(f"[DRIVER_CREATE] Generated driver ID: {driver_id}")
-        
-        driver = Driver(
-            id=driver_id,
-            location=location,
-            status=DriverStatus.IDLE,
-            pending_requests=[],
-            current_ride_id=None
-        )
-        
-        drivers[driver_id] = driver
-        print(f"[DRIVER_CREATE] SUCCESS: Driver {driver_id} created at ({location.x}, {location.y})")
-        print(f"[DRIVER_CREATE] Total drivers in system: {len(drivers)}")
-        
-        return driver
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        error_msg = f"Unexpected error creating driver: {str(e)}"
-        print(f"[DRIVER_CREATE] CRITICAL ERROR: {error_msg}")
-        raise HTTPException(status_code=500, detail=error_msg)
+    logger.debug("[DRIVER_CREATE] Starting driver creation at location: %s", location)
+    
+    # Validate location coordinates
+    if not _in_bounds(location):
+        error_msg = f"Invalid location coordinates: ({location.x}, {location.y}). Grid size is {GRID_SIZE}x{GRID_SIZE}"
+        logger.debug("[DRIVER_CREATE] ERROR: %s", error_msg)
+        raise HTTPException(status_code=400, detail=error_msg)
+    
+    driver_id = str(next(_driver_ids))
+    logger.debug("[DRIVER_CREATE] Generated driver ID: %s", driver_id)
+    
+    driver = DriverState(
+        id=driver_id,
+        location=Point(location.x, location.y),
+        status=DriverStatus.IDLE,
+        pending_requests={},
+        current_ride_id=None
+    )
+    
+    drivers[driver_id] = driver
+    driver_counts[driver.status] += 1
+    driver_index.add(driver)
+    invalidate_state()
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("[DRIVER_CREATE] SUCCESS: Driver %s created at (%d, %d)", driver_id, location.x, location.y)
+        logger.debug("[DRIVER_CREATE] Total drivers in system: %d", len(drivers))
+    
+    return driver
 
 @router.delete("/drivers/{driver_id}")
 async def delete_driver(driver_id: str):
     """Delete a driver by ID"""
     if driver_id not in drivers:
         raise HTTPException(status_code=404, detail="Driver not found")
-    del drivers[driver_id]
+    driver = drivers.pop(driver_id)
+    driver_counts[driver.status] -= 1
+    driver_index.remove(driver_id)
+    invalidate_state()
     return {"message": "Driver deleted"}
 
 @router.get("/drivers", response_model=List[Driver])
 async def get_drivers():
     """Get all drivers"""
-    return list(drivers.values())
+    return _json_response([*map(_driver_json, drivers.values())])
 
 @router.post("/riders", response_model=Rider)
 async def create_rider(pickup_location: Location, dropoff_location: Location):
     """Create a new rider with pickup and dropoff locations"""
-    try:
-        print(f"[RIDER_CREATE] Starting rider creation")
-        print(f"[RIDER_CREATE] Pickup location: {pickup_location}")
-        print(f"[RIDER_CREATE] Dropoff location: {dropoff_location}")
-        
-        # Validate pickup location coordinates
-        if pickup_location.x < 0 or pickup_location.y < 0 or pickup_location.x >= GRID_SIZE or pickup_location.y >= GRID_SIZE:
-            error_msg = f"Invalid pickup location coordinates: ({pickup_location.x}, {pickup_location.y}). Grid size is {GRID_SIZE}x{GRID_SIZE}"
-            print(f"[RIDER_CREATE] ERROR: {error_msg}")
-            raise HTTPException(status_code=400, detail=error_msg)
-        
-        # Validate dropoff location coordinates
-        if dropoff_location.x < 0 or dropoff_location.y < 0 or dropoff_location.x >= GRID_SIZE or dropoff_location.y >= GRID_SIZE:
-            error_msg = f"Invalid dropoff location coordinates: ({dropoff_location.x}, {dropoff_location.y}). Grid size is {GRID_SIZE}x{GRID_SIZE}"
-            print(f"[RIDER_CREATE] ERROR: {error_msg}")
-            raise HTTPException(status_code=400, detail=error_msg)
-        
-        # Check if pickup and dropoff are the same
-        if pickup_location.x == dropoff_location.x and pickup_location.y == dropoff_location.y:
-            error_msg = f"Pickup and dropoff locations cannot be the same: ({pickup_location.x}, {pickup_location.y})"
-            print(f"[RIDER_CREATE] ERROR: {error_msg}")
-            raise HTTPException(status_code=400, detail=error_msg)
-        
-        rider_id = str(uuid.uuid4())
-        print(f"[RIDER_CREATE] Generated rider ID: {rider_id}")
-        
-        rider = Rider(
-            id=rider_id,
-            pickup_location=pickup_location,
-            dropoff_location=dropoff_location,
-            status=RiderStatus.WAITING,
-            current_ride_id=None
-        )
-        
-        riders[rider_id] = rider
-        print(f"[RIDER_CREATE] SUCCESS: Rider {rider_id} created")
-        print(f"[RIDER_CREATE] Pickup: ({pickup_location.x}, {pickup_location.y}) → Dropoff: ({dropoff_location.x}, {dropoff_location.y})")
-        print(f"[RIDER_CREATE] Total riders in system: {len(riders)}")
-        
-        return rider
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        error_msg = f"Unexpected error creating rider: {str(e)}"
-        print(f"[RIDER_CREATE] CRITICAL ERROR: {error_msg}")
-        raise HTTPException(status_code=500, detail=error_msg)
+    logger.debug("[RIDER_CREATE] Starting rider creation")
+    logger.debug("[RIDER_CREATE] Pickup location: %s", pickup_location)
+    logger.debug("[RIDER_CREATE] Dropoff location: %s", dropoff_location)
+    
+    # Validate pickup location coordinates
+    if not _in_bounds(pickup_location):
+        error_msg = f"Invalid pickup location coordinates: ({pickup_location.x}, {pickup_location.y}). Grid size is {GRID_SIZE}x{GRID_SIZE}"
+        logger.debug("[RIDER_CREATE] ERROR: %s", error_msg)
+        raise HTTPException(status_code=400, detail=error_msg)
+    
+    # Validate dropoff location coordinates
+    if not _in_bounds(dropoff_location):
+        error_msg = f"Invalid dropoff location coordinates: ({dropoff_location.x}, {dropoff_location.y}). Grid size is {GRID_SIZE}x{GRID_SIZE}"
+        logger.debug("[RIDER_CREATE] ERROR: %s", error_msg)
+        raise HTTPException(status_code=400, detail=error_msg)
+    
+    # Check if pickup and dropoff are the same
+    if pickup_location.x == dropoff_location.x and pickup_location.y == dropoff_location.y:
+        error_msg = f"Pickup and dropoff locations cannot be the same: ({pickup_location.x}, {pickup_location.y})"
+        logger.debug("[RIDER_CREATE] ERROR: %s", error_msg)
+        raise HTTPException(status_code=400, detail=error_msg)
+    
+    rider_id = str(next(_rider_ids))
+    logger.debug("[RIDER_CREATE] Generated rider ID: %s", rider_id)
+    
+    rider = RiderState(
+        id=rider_id,
+        pickup_location=Point(pickup_location.x, pickup_location.y),
+        dropoff_location=Point(dropoff_location.x, dropoff_location.y),
+        status=RiderStatus.WAITING,
+        current_ride_id=None
+    )
+    
+    riders[rider_id] = rider
+    rider_counts[rider.status] += 1
+    invalidate_state()
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("[RIDER_CREATE] SUCCESS: Rider %s created", rider_id)
+        logger.debug("[RIDER_CREATE] Pickup: (%d, %d) → Dropoff: (%d, %d)", pickup_location.x, pickup_location.y, dropoff_location.x, dropoff_location.y)
+        logger.debug("[RIDER_CREATE] Total riders in system: %d", len(riders))
+    
+    return rider
 
 @router.delete("/riders/{rider_id}")
 async def delete_rider(rider_id: str):
     """Delete a rider by ID"""
     if rider_id not in riders:
         raise HTTPException(status_code=404, detail="Rider not found")
-    del riders[rider_id]
+    rider = riders.pop(rider_id)
+    rider_counts[rider.status] -= 1
+    invalidate_state()
     return {"message": "Rider deleted"}
 
 @router.get("/riders", response_model=List[Rider])
 async def get_riders():
     """Get all riders"""
-    return list(riders.values())
+    return _json_response([*map(_rider_json, riders.values())])
 
 @router.post("/rides", response_model=RideRequest)
 async def request_ride(ride_request: RideRequestCreate):
     """Create a new ride request for a rider"""
-    try:
-        rider_id = ride_request.rider_id
-        print(f"[RIDE_REQUEST] Starting ride request for rider: {rider_id}")
-        
-        # Validate rider exists
-        if rider_id not in riders:
-            error_msg = f"Rider not found: {rider_id}"
-            print(f"[RIDE_REQUEST] ERROR: {error_msg}")
-            raise HTTPException(status_code=404, detail=error_msg)
-        
-        rider = riders[rider_id]
-        print(f"[RIDE_REQUEST] Found rider: {rider_id}")
-        print(f"[RIDE_REQUEST] Rider pickup: ({rider.pickup_location.x}, {rider.pickup_location.y})")
-        print(f"[RIDE_REQUEST] Rider dropoff: ({rider.dropoff_location.x}, {rider.dropoff_location.y})")
-        
-        ride_id = str(uuid.uuid4())
-        print(f"[RIDE_REQUEST] Generated ride ID: {ride_id}")
-        
-        # Create ride request
-        ride_request = RideRequest(
-            id=ride_id,
-            rider_id=rider_id,
-            pickup_location=rider.pickup_location,
-            dropoff_location=rider.dropoff_location,
-            status="pending",
-            assigned_driver_id=None,
-            rejected_by=[]
-        )
-        
-        # Find closest available driver
-        available_drivers = find_available_drivers(drivers, rider.pickup_location, max_driver_requests=MAX_DRIVER_REQUESTS)
-        
-        if available_drivers:
-            closest_driver_id, distance = available_drivers[0]
-            driver = drivers[closest_driver_id]
-            
-            # Add request to driver's pending queue
-            driver.pending_requests.append(ride_id)
-            ride_request.assigned_driver_id = closest_driver_id
-            
-            print(f"[RIDE_REQUEST] Ride {ride_id} sent to closest driver {closest_driver_id[:8]} (distance: {distance:.2f})")
-            print(f"[RIDE_REQUEST] Driver {closest_driver_id[:8]} now has {len(driver.pending_requests)} pending requests")
+    rider_id = ride_request.rider_id
+    logger.debug("[RIDE_REQUEST] Starting ride request for rider: %s", rider_id)
+    
+    # Validate rider exists
+    if rider_id not in riders:
+        error_msg = f"Rider not found: {rider_id}"
+        logger.debug("[RIDE_REQUEST] ERROR: %s", error_msg)
+        raise HTTPException(status_code=404, detail=error_msg)
+    
+    rider = riders[rider_id]
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("[RIDE_REQUEST] Found rider: %s", rider_id)
+        logger.debug("[RIDE_REQUEST] Rider pickup: (%d, %d)", rider.pickup_location.x, rider.pickup_location.y)
+        logger.debug("[RIDE_REQUEST] Rider dropoff: (%d, %d)", rider.dropoff_location.x, rider.dropoff_location.y)
+    
+    ride_id = str(next(_ride_ids))
+    logger.debug("[RIDE_REQUEST] Generated ride ID: %s", ride_id)
+    
+    # Create ride request
+    ride_request = RideState(
+        id=ride_id,
+        rider_id=rider_id,
+        pickup_location=rider.pickup_location,
+        dropoff_location=rider.dropoff_location,
+        status=RideStatus.PENDING,
+        assigned_driver_id=None,
+        rejected_by=set()
+    )
+    
+    # Register the ride first so it is never lost if this request is cancelled mid-dispatch
+    ride_requests[ride_id] = ride_request
+    ride_history[ride_id] = ride_request
+    ride_counts[ride_request.status] += 1
+    invalidate_state()
+    
+    # Send to the closest available driver via the batching dispatcher
+    await dispatch_ride(ride_request)
+    
+    # /clear-state ran while the ride was waiting, so it no longer exists
+    if ride_id not in ride_history:
+        error_msg = f"Ride {ride_id} was discarded by a state clear"
+        logger.debug("[RIDE_REQUEST] ERROR: %s", error_msg)
+        raise HTTPException(status_code=409, detail=error_msg)
+    
+    if logger.isEnabledFor(logging.DEBUG):
+        if ride_request.assigned_driver_id:
+            driver = drivers[ride_request.assigned_driver_id]
+            logger.debug("[RIDE_REQUEST] Ride %s sent to closest driver %s", ride_id, driver.short_id)
+            logger.debug("[RIDE_REQUEST] Driver %s now has %d pending requests", driver.short_id, len(driver.pending_requests))
         else:
-            print(f"[RIDE_REQUEST] WARNING: No available drivers found")
-            ride_request.status = "rejected"
-        
-        ride_requests[ride_id] = ride_request
-        print(f"[RIDE_REQUEST] SUCCESS: Ride {ride_id} created with status: {ride_request.status}")
-        print(f"[RIDE_REQUEST] Total active rides: {len(ride_requests)}")
-        
-        return ride_request
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        error_msg = f"Unexpected error requesting ride: {str(e)}"
-        print(f"[RIDE_REQUEST] CRITICAL ERROR: {error_msg}")
-        raise HTTPException(status_code=500, detail=error_msg)
+            logger.debug("[RIDE_REQUEST] WARNING: No available drivers found")
+    
+        logger.debug("[RIDE_REQUEST] SUCCESS: Ride %s created with status: %s", ride_id, ride_request.status)
+        logger.debug("[RIDE_REQUEST] Total live rides: %d", len(ride_requests))
+    
+    return ride_request
 
 @router.post("/rides/{ride_id}/respond", response_model=RideRequest)
 async def driver_respond_to_ride(ride_id: str, response: DriverResponse):
     """Handle driver response to a ride request (accept/reject)"""
-    try:
-        print(f"[DRIVER_RESPONSE] Driver responding to ride {ride_id}")
-        print(f"[DRIVER_RESPONSE] Action: {response.action}")
-        
-        # Validate ride exists
-        if ride_id not in ride_requests:
-            error_msg = f"Ride not found: {ride_id}"
-            print(f"[DRIVER_RESPONSE] ERROR: {error_msg}")
-            raise HTTPException(status_code=404, detail=error_msg)
-        
-        ride = ride_requests[ride_id]
-        print(f"[DRIVER_RESPONSE] Found ride: {ride_id}")
-        print(f"[DRIVER_RESPONSE] Current status: {ride.status}")
-        
-        # Validate ride is pending
-        if ride.status != "pending":
-            error_msg = f"Ride {ride_id} is not pending. Current status: {ride.status}"
-            print(f"[DRIVER_RESPONSE] ERROR: {error_msg}")
-            raise HTTPException(status_code=400, detail=error_msg)
-        
-        # Validate driver exists
-        if not ride.assigned_driver_id or ride.assigned_driver_id not in drivers:
-            error_msg = f"Assigned driver not found for ride {ride_id}"
-            print(f"[DRIVER_RESPONSE] ERROR: {error_msg}")
-            raise HTTPException(status_code=400, detail=error_msg)
-        
-        driver = drivers[ride.assigned_driver_id]
-        print(f"[DRIVER_RESPONSE] Driver: {ride.assigned_driver_id}")
-        print(f"[DRIVER_RESPONSE] Driver current status: {driver.status}")
-        
-        # Process driver response
-        if response.action.lower() == "accept":
-            print(f"[DRIVER_RESPONSE] Driver accepting ride")
-            
-            # Check if driver is still idle
-            if driver.status != DriverStatus.IDLE:
-                error_msg = f"Driver {ride.assigned_driver_id} is not idle. Current status: {driver.status}"
-                print(f"[DRIVER_RESPONSE] ERROR: {error_msg}")
-                raise HTTPException(status_code=400, detail=error_msg)
-            
-            # Accept the ride
-            ride.status = "accepted"
-            driver.status = DriverStatus.GOING_TO_PICKUP
-            driver.current_ride_id = ride_id
-            
-            # Remove this request from driver's pending requests
-            if ride_id in driver.pending_requests:
-                driver.pending_requests.remove(ride_id)
-            
-            # Reject all other pending requests for this driver
-            for other_ride_id in driver.pending_requests[:]:  # Copy list to avoid modification during iteration
-                other_ride = ride_requests[other_ride_id]
-                other_ride.rejected_by.append(ride.assigned_driver_id)
-                other_ride.assigned_driver_id = None
-                send_request_to_next_driver(other_ride, drivers, ride_requests, MAX_DRIVER_REQUESTS)
-            
-            # Clear driver's pending requests (all rejected)
-            driver.pending_requests.clear()
-            
-            # Update rider status
-            rider = riders[ride.rider_id]
-            rider.status = RiderStatus.ASSIGNED
-            rider.current_ride_id = ride_id
-            
-            print(f"[DRIVER_RESPONSE] SUCCESS: Ride {ride_id} accepted by driver {ride.assigned_driver_id}")
-            print(f"[DRIVER_RESPONSE] Driver status changed to GOING_TO_PICKUP")
-            print(f"[DRIVER_RESPONSE] All other pending requests for this driver have been rejected and rerouted")
-            
-        elif response.action.lower() == "reject":
-            print(f"[DRIVER_RESPONSE] Driver rejecting ride")
-            
-            # Add driver to rejected list
-            ride.rejected_by.append(ride.assigned_driver_id)
-            
-            # Remove request from driver's pending queue
-            if ride_id in driver.pending_requests:
-                driver.pending_requests.remove(ride_id)
-            
-            # Try to find next closest driver
-            send_request_to_next_driver(ride, drivers, ride_requests, MAX_DRIVER_REQUESTS)
-            
-            print(f"[DRIVER_RESPONSE] SUCCESS: Ride {ride_id} rejected by driver {ride.assigned_driver_id}")
-            print(f"[DRIVER_RESPONSE] Request sent to next closest driver")
-        else:
-            error_msg = f"Invalid action: {response.action}. Must be 'accept' or 'reject'"
-            print(f"[DRIVER_RESPONSE] ERROR: {error_msg}")
-            raise HTTPException(status_code=400, detail=error_msg)
-        
-        print(f"[DRIVER_RESPONSE] Final ride status: {ride.status}")
-        return ride
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        error_msg = f"Unexpected error processing driver response: {str(e)}"
-        print(f"[DRIVER_RESPONSE] CRITICAL ERROR: {error_msg}")
-        raise HTTPException(status_code=500, detail=error_msg)
+    logger.debug("[DRIVER_RESPONSE] Driver responding to ride %s", ride_id)
+    logger.debug("[DRIVER_RESPONSE] Action: %s", response.action)
+    
+    # Validate ride exists
+    ride = ride_history.get(ride_id)
+    if ride is None:
+        error_msg = f"Ride not found: {ride_id}"
+        logger.debug("[DRIVER_RESPONSE] ERROR: %s", error_msg)
+        raise HTTPException(status_code=404, detail=error_msg)
+    
+    logger.debug("[DRIVER_RESPONSE] Found ride: %s", ride_id)
+    logger.debug("[DRIVER_RESPONSE] Current status: %s", ride.status)
+    
+    # The ride was reassigned or changed status since the caller last read it. Only the ride is
+    # versioned: reassignment bumps it, so a stale view can't act for another driver, and the
+    # driver's own state is re-checked below within the same await-free handler.
+    if response.version is not None and response.version != ride.version:
+        error_msg = f"Ride {ride_id} has changed (version {ride.version}, expected {response.version})"
+        logger.debug("[DRIVER_RESPONSE] ERROR: %s", error_msg)
+        raise HTTPException(status_code=409, detail=error_msg)
+    
+    # Validate ride is pending
+    if ride.status != RideStatus.PENDING:
+        error_msg = f"Ride {ride_id} is not pending. Current status: {ride.status}"
+        logger.debug("[DRIVER_RESPONSE] ERROR: %s", error_msg)
+        raise HTTPException(status_code=400, detail=error_msg)
+    
+    # Validate driver exists
+    if not ride.assigned_driver_id or ride.assigned_driver_id not in drivers:
+        error_msg = f"Assigned driver not found for ride {ride_id}"
+        logger.debug("[DRIVER_RESPONSE] ERROR: %s", error_msg)
+        raise HTTPException(status_code=400, detail=error_msg)
+    
+    driver = drivers[ride.assigned_driver_id]
+    logger.debug("[DRIVER_RESPONSE] Driver: %s", ride.assigned_driver_id)
+    logger.debug("[DRIVER_RESPONSE] Driver current status: %s", driver.status)
+    
+    action = response.action.lower()
+    if action not in ("accept", "reject"):
+        error_msg = f"Invalid action: {response.action}. Must be 'accept' or 'reject'"
+        logger.debug("[DRIVER_RESPONSE] ERROR: %s", error_msg)
+        raise HTTPException(status_code=400, detail=error_msg)
+    
+    # Check if driver is still idle
+    if action == "accept" and driver.status != DriverStatus.IDLE:
+        error_msg = f"Driver {ride.assigned_driver_id} is not idle. Current status: {driver.status}"
+        logger.debug("[DRIVER_RESPONSE] ERROR: %s", error_msg)
+        raise HTTPException(status_code=400, detail=error_msg)
+    
+    # Process driver response; every check has passed, so the state is about to change
+    invalidate_state()
+    if action == "accept":
+        logger.debug("[DRIVER_RESPONSE] Driver accepting ride")
+        
+        # Accept the ride
+        ride.status = RideStatus.ACCEPTED
+        ride.version += 1
+        transition(ride_counts, RideStatus.PENDING, RideStatus.ACCEPTED)
+        driver.status = DriverStatus.GOING_TO_PICKUP
+        transition(driver_counts, DriverStatus.IDLE, DriverStatus.GOING_TO_PICKUP)
+        driver.current_ride_id = ride_id
+        
+        # Take the driver's whole queue in one swap; everything but this ride gets rerouted
+        queued = driver_index.clear_requests(driver)
+        queued.pop(ride_id, None)
+        driver_index.update(driver)  # No longer idle, so it drops out of dispatch before rerouting
+        driver_index.set_target(driver, ride_id, ride.pickup_location)
+        
+        # Reject all other pending requests for this driver and reroute them in one batch
+        orphans = [ride_requests[other_ride_id] for other_ride_id in queued]
+        for other_ride in orphans:
+            other_ride.rejected_by.add(ride.assigned_driver_id)
+            other_ride.assigned_driver_id = None
+        batch_assign(orphans, drivers, driver_index, MAX_DRIVER_REQUESTS)
+        _finish_rejected(orphans)
+        
+        # Update rider status
+        rider = riders[ride.rider_id]
+        transition(rider_counts, rider.status, RiderStatus.ASSIGNED)
+        rider.status = RiderStatus.ASSIGNED
+        rider.current_ride_id = ride_id
+        
+        logger.debug("[DRIVER_RESPONSE] SUCCESS: Ride %s accepted by driver %s", ride_id, ride.assigned_driver_id)
+        logger.debug("[DRIVER_RESPONSE] Driver status changed to GOING_TO_PICKUP")
+        logger.debug("[DRIVER_RESPONSE] All other pending requests for this driver have been rejected and rerouted")
+        
+    else:
+        logger.debug("[DRIVER_RESPONSE] Driver rejecting ride")
+        
+        # Add driver to rejected list
+        ride.rejected_by.add(ride.assigned_driver_id)
+        
+        # Remove request from driver's pending queue
+        driver_index.remove_request(driver, ride_id)
+        
+        # Try to find next closest driver
+        if not send_request_to_next_driver(ride, drivers, driver_index, ride_requests, MAX_DRIVER_REQUESTS):
+            _finish_rejected((ride,))
+        
+        logger.debug("[DRIVER_RESPONSE] SUCCESS: Ride %s rejected by driver %s", ride_id, ride.assigned_driver_id)
+        logger.debug("[DRIVER_RESPONSE] Request sent to next closest driver")
+    
+    logger.debug("[DRIVER_RESPONSE] Final ride status: %s", ride.status)
+    return ride
 
 @router.get("/drivers/{driver_id}/pending-rides", response_model=List[RideRequest])
 async def get_driver_pending_rides(driver_id: str):
     """Get all pending rides for a specific driver"""
-    try:
-        print(f"[DRIVER_PENDING_RIDES] Fetching pending rides for driver: {driver_id}")
-        
-        # Validate driver exists
-        if driver_id not in drivers:
-            error_msg = f"Driver not found: {driver_id}"
-            print(f"[DRIVER_PENDING_RIDES] ERROR: {error_msg}")
-            raise HTTPException(status_code=404, detail=error_msg)
-        
-        # Find rides pending for this driver
-        pending_rides = [
-            ride for ride in ride_requests.values()
-            if ride.assigned_driver_id == driver_id and ride.status == "pending"
-        ]
-        
-        print(f"[DRIVER_PENDING_RIDES] Found {len(pending_rides)} pending rides for driver {driver_id}")
-        return pending_rides
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        error_msg = f"Unexpected error fetching driver pending rides: {str(e)}"
-        print(f"[DRIVER_PENDING_RIDES] CRITICAL ERROR: {error_msg}")
-        raise HTTPException(status_code=500, detail=error_msg)
+    logger.debug("[DRIVER_PENDING_RIDES] Fetching pending rides for driver: %s", driver_id)
+    
+    # Validate driver exists
+    if driver_id not in drivers:
+        error_msg = f"Driver not found: {driver_id}"
+        logger.debug("[DRIVER_PENDING_RIDES] ERROR: %s", error_msg)
+        raise HTTPException(status_code=404, detail=error_msg)
+    
+    # The driver's own queue already holds its pending ride ids, in arrival order
+    pending_rides = [
+        ride for ride in map(ride_requests.__getitem__, drivers[driver_id].pending_requests)
+        if ride.status == RideStatus.PENDING
+    ]
+    
+    logger.debug("[DRIVER_PENDING_RIDES] Found %d pending rides for driver %s", len(pending_rides), driver_id)
+    return _json_response([*map(_ride_json, pending_rides)])
 
 @router.get("/rides", response_model=List[RideRequest])
 async def get_rides():
     """Get all ride requests"""
-    return list(ride_requests.values())
+    return _json_response(_rides_json())
 
 @router.post("/tick")
 async def tick():
     """Advance time by one tick"""
     global current_tick
-    try:
-        print(f"[TICK] Starting time advancement from tick {current_tick} to {current_tick + 1}")
-        
-        current_tick += 1
-        
-        print(f"[TICK] Advanced to tick {current_tick}")
-        print(f"[TICK] Processing {len(ride_requests)} ride requests")
-        
-        completed_rides = 0
-        active_rides = 0
-        
-        # Update driver positions and ride statuses
-        for ride_id, ride in ride_requests.items():
-            if ride.status == "accepted" and ride.assigned_driver_id:
-                active_rides += 1
-                driver = drivers[ride.assigned_driver_id]
-                rider = riders[ride.rider_id]
-                
-                print(f"[TICK] Processing ride {ride_id[:8]} with driver {ride.assigned_driver_id[:8]}")
-                print(f"[TICK] Driver location: ({driver.location.x}, {driver.location.y})")
-                print(f"[TICK] Pickup location: ({ride.pickup_location.x}, {ride.pickup_location.y})")
-                print(f"[TICK] Dropoff location: ({ride.dropoff_location.x}, {ride.dropoff_location.y})")
-                
-                # Move driver towards pickup location
-                if driver.status == DriverStatus.GOING_TO_PICKUP:
-                    if driver.location != ride.pickup_location:
-                        reached_pickup = move_driver_towards_location(driver, ride.pickup_location)
-                    
-                    # Check if reached pickup location
-                    if driver.location == ride.pickup_location:
-                        driver.status = DriverStatus.DRIVING_TO_DEST
-                        rider.status = RiderStatus.IN_TRANSIT
-                        print(f"[TICK] Driver reached pickup location")
-                        print(f"[TICK] Driver status changed to DRIVING_TO_DEST")
-                        print(f"[TICK] Rider status changed to IN_TRANSIT")
-                
-                # Move driver towards dropoff location
-                elif driver.status == DriverStatus.DRIVING_TO_DEST:
-                    if driver.location != ride.dropoff_location:
-                        reached_dropoff = move_driver_towards_location(driver, ride.dropoff_location)
-                    
-                    # Check if reached dropoff location
-                    if driver.location == ride.dropoff_location:
-                        ride.status = "completed"
-                        driver.status = DriverStatus.IDLE
-                        driver.current_ride_id = None
-                        rider.status = RiderStatus.COMPLETED
-                        rider.current_ride_id = None
-                        completed_rides += 1
-                        print(f"[TICK] SUCCESS: Ride {ride_id[:8]} completed!")
-                        print(f"[TICK] Driver {ride.assigned_driver_id[:8]} status changed to IDLE")
-                        print(f"[TICK] Rider {ride.rider_id[:8]} status changed to COMPLETED")
-        
-        print(f"[TICK] SUCCESS: Time advancement completed")
-        print(f"[TICK] Summary: {active_rides} active rides processed, {completed_rides} rides completed")
-        print(f"[TICK] Current system state: {len(drivers)} drivers, {len(riders)} riders, {len(ride_requests)} total rides")
-        
+    logger.debug("[TICK] Starting time advancement from tick %d to %d", current_tick, current_tick + 1)
+    
+    current_tick += 1
+    invalidate_state()
+    
+    logger.debug("[TICK] Advanced to tick %d", current_tick)
+    
+    completed_rides = 0
+    
+    # Every driver on a ride carries its current target in the index; move them all in one vectorized pass
+    n = driver_index.size
+    moving = driver_index.moving[:n]
+    rows = np.flatnonzero(moving)
+    logger.debug("[TICK] Processing %d active rides", rows.size)
+    
+    # No driver is on a ride, so there is nothing to move or complete
+    if not rows.size:
         return {"tick": current_tick, "message": "Time advanced"}
-        
-    except Exception as e:
-        error_msg = f"Unexpected error during time advancement: {str(e)}"
-        print(f"[TICK] CRITICAL ERROR: {error_msg}")
-        raise HTTPException(status_code=500, detail=error_msg)
+    
+    arrived = move_all_drivers_towards(driver_index, driver_index.tx[:n], driver_index.ty[:n], moving)
+    
+    # Hoist the lookups used per driver into locals for the loops below
+    ids = driver_index.ids
+    ride_ids = driver_index.ride_ids
+    get_driver = drivers.__getitem__
+    get_ride = ride_requests.__getitem__
+    get_rider = riders.__getitem__
+    going_to_pickup = DriverStatus.GOING_TO_PICKUP
+    
+    # Write the new positions back to the moved drivers, reading the arrays in bulk
+    for driver_id, x, y in zip(ids[rows].tolist(), driver_index.xs[rows].tolist(), driver_index.ys[rows].tolist()):
+        location = get_driver(driver_id).location
+        location.x = x
+        location.y = y
+    
+    # Apply status transitions only for drivers that arrived, in ride creation order: one rider
+    # can have several accepted rides, and the last transition applied decides the rider's status.
+    # Ride ids are sequential, so their numeric value is the creation order.
+    for row in sorted(np.flatnonzero(arrived).tolist(), key=lambda row: int(ride_ids[row])):
+        driver = get_driver(ids[row])
+        ride = get_ride(ride_ids[row])
+        rider = get_rider(ride.rider_id)
+        
+        # Reached pickup location, head for the dropoff
+        if driver.status == going_to_pickup:
+            driver.status = DriverStatus.DRIVING_TO_DEST
+            transition(driver_counts, going_to_pickup, DriverStatus.DRIVING_TO_DEST)
+            transition(rider_counts, rider.status, RiderStatus.IN_TRANSIT)
+            rider.status = RiderStatus.IN_TRANSIT
+            driver_index.set_target(driver, ride.id, ride.dropoff_location)
+        
+        # Reached dropoff location
+        else:
+            ride.status = RideStatus.COMPLETED
+            ride.version += 1
+            transition(ride_counts, RideStatus.ACCEPTED, RideStatus.COMPLETED)
+            driver.status = DriverStatus.IDLE
+            transition(driver_counts, DriverStatus.DRIVING_TO_DEST, DriverStatus.IDLE)
+            driver.current_ride_id = None
+            transition(rider_counts, rider.status, RiderStatus.COMPLETED)
+            rider.status = RiderStatus.COMPLETED
+            rider.current_ride_id = None
+            completed_rides += 1
+            driver_index.clear_target(driver)
+            _archive(ride)
+        
+        driver_index.update(driver)
+    
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("[TICK] SUCCESS: Time advancement completed")
+        logger.debug("[TICK] Summary: %d active rides processed, %d rides completed", len(rows), completed_rides)
+        logger.debug("[TICK] Current system state: %d drivers, %d riders, %d total rides", len(drivers), len(riders), len(ride_history))
+    
+    return {"tick": current_tick, "message": "Time advanced"}
+
+def _statistics() -> dict:
+    """Per-status totals, read from the live status counters rather than rescanning every entity"""
+    idle_drivers = driver_counts[DriverStatus.IDLE]
+    return {
+        "idle_drivers": idle_drivers,
+        "busy_drivers": len(drivers) - idle_drivers,
+        "waiting_riders": rider_counts[RiderStatus.WAITING],
+        "assigned_riders": rider_counts[RiderStatus.ASSIGNED],
+        "in_transit_riders": rider_counts[RiderStatus.IN_TRANSIT],
+        "completed_riders": rider_counts[RiderStatus.COMPLETED],
+        "pending_rides": ride_counts[RideStatus.PENDING],
+        "accepted_rides": ride_counts[RideStatus.ACCEPTED],
+        "completed_rides": ride_counts[RideStatus.COMPLETED],
+        "rejected_rides": ride_counts[RideStatus.REJECTED]
+    }
 
 @router.get("/state")
 async def get_state():
     """Get current system state"""
-    try:
-        print(f"[STATE] Fetching current system state at tick {current_tick}")
-        
-        # Calculate statistics
-        idle_drivers = [d for d in drivers.values() if d.status == DriverStatus.IDLE]
-        busy_drivers = [d for d in drivers.values() if d.status != DriverStatus.IDLE]
-        waiting_riders = [r for r in riders.values() if r.status == RiderStatus.WAITING]
-        assigned_riders = [r for r in riders.values() if r.status == RiderStatus.ASSIGNED]
-        in_transit_riders = [r for r in riders.values() if r.status == RiderStatus.IN_TRANSIT]
-        completed_riders = [r for r in riders.values() if r.status == RiderStatus.COMPLETED]
-        
-        pending_rides = [r for r in ride_requests.values() if r.status == "pending"]
-        accepted_rides = [r for r in ride_requests.values() if r.status == "accepted"]
-        completed_rides = [r for r in ride_requests.values() if r.status == "completed"]
-        rejected_rides = [r for r in ride_requests.values() if r.status == "rejected"]
-        
-        print(f"[STATE] System summary:")
-        print(f"[STATE]   - Current tick: {current_tick}")
-        print(f"[STATE]   - Total drivers: {len(drivers)} (idle: {len(idle_drivers)}, busy: {len(busy_drivers)})")
-        print(f"[STATE]   - Total riders: {len(riders)} (waiting: {len(waiting_riders)}, assigned: {len(assigned_riders)}, in_transit: {len(in_transit_riders)}, completed: {len(completed_riders)})")
-        print(f"[STATE]   - Total rides: {len(ride_requests)} (pending: {len(pending_rides)}, accepted: {len(accepted_rides)}, completed: {len(completed_rides)}, rejected: {len(rejected_rides)})")
-        
-        state = {
-            "tick": current_tick,
-            "drivers": list(drivers.values()),
-            "riders": list(riders.values()),
-            "rides": list(ride_requests.values()),
-            "grid_size": GRID_SIZE,
-            "statistics": {
-                "idle_drivers": len(idle_drivers),
-                "busy_drivers": len(busy_drivers),
-                "waiting_riders": len(waiting_riders),
-                "assigned_riders": len(assigned_riders),
-                "in_transit_riders": len(in_transit_riders),
-                "completed_riders": len(completed_riders),
-                "pending_rides": len(pending_rides),
-                "accepted_rides": len(accepted_rides),
-                "completed_rides": len(completed_rides),
-                "rejected_rides": len(rejected_rides)
-            }
-        }
-        
-        print(f"[STATE] SUCCESS: State returned successfully")
-        return state
-        
-    except Exception as e:
-        error_msg = f"Unexpected error fetching state: {str(e)}"
-        print(f"[STATE] CRITICAL ERROR: {error_msg}")
-        raise HTTPException(status_code=500, detail=error_msg)
+    global state_json
+    logger.debug("[STATE] Fetching current system state at tick %d", current_tick)
+    
+    # Nothing has changed since the last poll, so the previous body is still exact
+    if state_json is not None:
+        return Response(content=state_json, media_type="application/json")
+    
+    statistics = _statistics()
+    
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("[STATE] System summary:")
+        logger.debug("[STATE]   - Current tick: %d", current_tick)
+        logger.debug("[STATE]   - Totals: %d drivers, %d riders, %d rides", len(drivers), len(riders), len(ride_history))
+        logger.debug("[STATE]   - Statistics: %s", statistics)
+    
+    # Already JSON-ready, so hand it straight to orjson instead of through jsonable_encoder
+    state_json = orjson.dumps({
+        "tick": current_tick,
+        "drivers": [*map(_driver_json, drivers.values())],
+        "riders": [*map(_rider_json, riders.values())],
+        "rides": _rides_json(),
+        "grid_size": GRID_SIZE,
+        "statistics": statistics
+    })
+    
+    logger.debug("[STATE] SUCCESS: State returned successfully")
+    return Response(content=state_json, media_type="application/json")
+
+@router.get("/state/summary")
+async def get_state_summary():
+    """Current tick and statistics only, without serializing any entities"""
+    return {"tick": current_tick, "statistics": _statistics()}
 
 @router.post("/clear-state")
 async def clear_state():
     """Clear all system state - remove all drivers, riders, and ride requests"""
-    global drivers, riders, ride_requests, current_tick
+    global current_tick
     
-    try:
-        print(f"[CLEAR_STATE] Starting system state clear")
-        print(f"[CLEAR_STATE] Current state before clear:")
-        print(f"[CLEAR_STATE]   - Drivers: {len(drivers)}")
-        print(f"[CLEAR_STATE]   - Riders: {len(riders)}")
-        print(f"[CLEAR_STATE]   - Rides: {len(ride_requests)}")
-        print(f"[CLEAR_STATE]   - Current tick: {current_tick}")
-        
-        # Clear all data structures
-        drivers.clear()
-        riders.clear()
-        ride_requests.clear()
-        current_tick = 0
-        
-        print(f"[CLEAR_STATE] SUCCESS: All system state cleared")
-        print(f"[CLEAR_STATE] New state:")
-        print(f"[CLEAR_STATE]   - Drivers: {len(drivers)}")
-        print(f"[CLEAR_STATE]   - Riders: {len(riders)}")
-        print(f"[CLEAR_STATE]   - Rides: {len(ride_requests)}")
-        print(f"[CLEAR_STATE]   - Current tick: {current_tick}")
-        
-        return {
-            "message": "System state cleared successfully",
-            "tick": current_tick,
-            "drivers_cleared": 0,
-            "riders_cleared": 0,
-            "rides_cleared": 0
-        }
-        
-    except Exception as e:
-        error_msg = f"Unexpected error clearing state: {str(e)}"
-        print(f"[CLEAR_STATE] CRITICAL ERROR: {error_msg}")
-        raise HTTPException(status_code=500, detail=error_msg) 
\ No newline at end of file
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("[CLEAR_STATE] Starting system state clear")
+        logger.debug("[CLEAR_STATE] Current state before clear:")
+        logger.debug("[CLEAR_STATE]   - Drivers: %d", len(drivers))
+        logger.debug("[CLEAR_STATE]   - Riders: %d", len(riders))
+        logger.debug("[CLEAR_STATE]   - Rides: %d", len(ride_history))
+        logger.debug("[CLEAR_STATE]   - Current tick: %d", current_tick)
+    
+    # Rides still queued for dispatch belong to the state being cleared; release their requests
+    if dispatch_queue is not None:
+        while not dispatch_queue.empty():
+            _, done = dispatch_queue.get_nowait()
+            if not done.done():
+                done.set_result(None)
+    
+    # Clear all data structures
+    drivers.clear()
+    riders.clear()
+    ride_requests.clear()
+    ride_history.clear()
+    driver_counts.clear()
+    rider_counts.clear()
+    ride_counts.clear()
+    driver_index.clear()
+    current_tick = 0
+    invalidate_state()
+    
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("[CLEAR_STATE] SUCCESS: All system state cleared")
+        logger.debug("[CLEAR_STATE] New state:")
+        logger.debug("[CLEAR_STATE]   - Drivers: %d", len(drivers))
+        logger.debug("[CLEAR_STATE]   - Riders: %d", len(riders))
+        logger.debug("[CLEAR_STATE]   - Rides: %d", len(ride_history))
+        logger.debug("[CLEAR_STATE]   - Current tick: %d", current_tick)
+    
+    return {
+        "message": "System state cleared successfully",
+        "tick": current_tick,
+        "drivers_cleared": 0,
+        "riders_cleared": 0,
+        "rides_cleared": 0
+    }
@@ -0,0 +1,50 @@
+import asyncio
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+# The app is a set of top-level modules, so make the repository root importable
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # "/" serves static/index.html relative to the working directory
+
+import main  # noqa: E402
+import routes  # noqa: E402
+from driver_index import DriverIndex  # noqa: E402
+from models import DriverState, DriverStatus, Point  # noqa: E402
+
+MAX_REQUESTS = 2
+
+def make_fleet(rng, n, size, grid_cell):
+    """Index and driver dict of `n` idle drivers at random points of a size x size grid"""
+    index = DriverIndex(capacity=4, grid_cell=grid_cell, max_requests=MAX_REQUESTS)
+    drivers = {}
+    for i in range(n):
+        driver = DriverState(str(i), Point(rng.randrange(size), rng.randrange(size)), DriverStatus.IDLE)
+        drivers[driver.id] = driver
+        index.add(driver)
+    return index, drivers
+
+def brute_force_nearest(drivers, pickup, exclude):
+    """Closest available driver, ties going to the earliest-created one (dict order)"""
+    best = None
+    for order, driver in enumerate(drivers.values()):
+        if driver.status != DriverStatus.IDLE or len(driver.pending_requests) >= MAX_REQUESTS or driver.id in exclude:
+            continue
+        d2 = (driver.location.x - pickup.x) ** 2 + (driver.location.y - pickup.y) ** 2
+        if best is None or (d2, order) < best[:2]:
+            best = (d2, order, driver.id)
+    return (best[2], best[0]) if best is not None else None
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    """Start every test from an empty system"""
+    asyncio.run(routes.clear_state())
+    yield
+    asyncio.run(routes.clear_state())
+
+@pytest.fixture
+def client():
+    return TestClient(main.app)
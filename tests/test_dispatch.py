@@ -0,0 +1,184 @@
+import asyncio
+import random
+
+import pytest
+from fastapi import HTTPException
+
+import routes
+from conftest import MAX_REQUESTS, make_fleet
+from helpers import batch_assign, send_request_to_next_driver
+from models import Location, RideRequestCreate, RideState, RideStatus, Point
+
+def make_rides(rng, n, size, driver_ids):
+    rides = []
+    for i in range(n):
+        ride = RideState(
+            id=f"ride-{i}",
+            rider_id=f"rider-{i}",
+            pickup_location=Point(rng.randrange(size), rng.randrange(size)),
+            dropoff_location=Point(rng.randrange(size), rng.randrange(size)),
+            status=RideStatus.PENDING,
+        )
+        ride.rejected_by.update(rng.sample(driver_ids, rng.randrange(3)))
+        rides.append(ride)
+    return rides
+
+@pytest.mark.parametrize("grid_cell", [10, None])
+def test_batch_assign_matches_one_at_a_time(grid_cell):
+    # Two identical fleets: one takes the rides as a batch, the other ride by ride
+    batch_index, batch_drivers = make_fleet(random.Random(3), 25, 30, grid_cell)
+    single_index, single_drivers = make_fleet(random.Random(3), 25, 30, grid_cell)
+    batch_rides = make_rides(random.Random(4), 60, 30, list(batch_drivers))
+    single_rides = make_rides(random.Random(4), 60, 30, list(single_drivers))
+
+    batch_assign(batch_rides, batch_drivers, batch_index, MAX_REQUESTS)
+    for ride in single_rides:
+        send_request_to_next_driver(ride, single_drivers, single_index, {}, MAX_REQUESTS)
+
+    assert [(r.status, r.assigned_driver_id) for r in batch_rides] == [(r.status, r.assigned_driver_id) for r in single_rides]
+    # The fleet runs out of capacity part way through, so both outcomes are exercised
+    assert {r.status for r in batch_rides} == {RideStatus.PENDING, RideStatus.REJECTED}
+    for ride in batch_rides:
+        if ride.assigned_driver_id is not None:
+            assert ride.assigned_driver_id not in ride.rejected_by
+    assert list(batch_index.pending[:batch_index.size]) == list(single_index.pending[:single_index.size])
+
+async def _create_rider():
+    return await routes.create_rider(Location(x=0, y=0), Location(x=5, y=5))
+
+def test_ride_queued_across_clear_state_is_discarded():
+    async def scenario():
+        rider = await _create_rider()
+        queued = asyncio.create_task(routes.request_ride(RideRequestCreate(rider_id=rider.id)))
+        await asyncio.sleep(0)  # The ride is now waiting in the dispatch queue
+        await routes.clear_state()
+
+        with pytest.raises(HTTPException) as exc_info:
+            await asyncio.wait_for(queued, 1)
+        assert exc_info.value.status_code == 409
+
+        # A driver created after the clear must not inherit the stale ride
+        driver = await routes.create_driver(Location(x=1, y=1))
+        await asyncio.sleep(0)
+        assert driver.pending_requests == {}
+        assert routes.ride_requests == {}
+
+        # The dispatcher survived and serves new requests
+        rider = await _create_rider()
+        ride = await asyncio.wait_for(routes.request_ride(RideRequestCreate(rider_id=rider.id)), 1)
+        assert ride.status == RideStatus.PENDING
+        assert ride.assigned_driver_id == driver.id
+        assert not routes._dispatcher_task.done()
+
+    asyncio.run(scenario())
+
+def test_dispatcher_survives_a_failing_batch(monkeypatch):
+    async def scenario():
+        await routes.create_driver(Location(x=1, y=1))
+        rider = await _create_rider()
+
+        def fail(*args, **kwargs):
+            raise RuntimeError("boom")
+        monkeypatch.setattr(routes, "batch_assign", fail)
+        with pytest.raises(RuntimeError):
+            await asyncio.wait_for(routes.request_ride(RideRequestCreate(rider_id=rider.id)), 1)
+        monkeypatch.undo()
+
+        # The failed ride is rejected and archived rather than left pending with no driver
+        (failed,) = routes.ride_history.values()
+        assert failed.status == RideStatus.REJECTED and failed.assigned_driver_id is None
+        assert routes.ride_requests == {}
+        assert routes._statistics()["pending_rides"] == 0
+        assert routes._statistics()["rejected_rides"] == 1
+
+        ride = await asyncio.wait_for(routes.request_ride(RideRequestCreate(rider_id=rider.id)), 1)
+        assert ride.status == RideStatus.PENDING
+
+    asyncio.run(scenario())
+
+def _post_ride(client, pickup, dropoff):
+    rider = client.post("/riders", json={"pickup_location": pickup, "dropoff_location": dropoff}).json()
+    return client.post("/rides", json={"rider_id": rider["id"]}).json()
+
+def test_stale_version_is_refused_with_409(client):
+    near = client.post("/drivers", json={"x": 1, "y": 1}).json()
+    far = client.post("/drivers", json={"x": 50, "y": 50}).json()
+    ride = _post_ride(client, {"x": 0, "y": 0}, {"x": 5, "y": 5})
+    assert ride["assigned_driver_id"] == near["id"]
+
+    rejected = client.post(f"/rides/{ride['id']}/respond", json={"action": "reject", "ride_id": ride["id"], "version": ride["version"]})
+    assert rejected.status_code == 200
+    assert rejected.json()["assigned_driver_id"] == far["id"]
+
+    # The near driver's view is stale: accepting with it must not accept on the far driver's behalf
+    stale = client.post(f"/rides/{ride['id']}/respond", json={"action": "accept", "ride_id": ride["id"], "version": ride["version"]})
+    assert stale.status_code == 409
+    assert client.get("/rides").json()[0]["status"] == "pending"
+
+def test_refused_responses_keep_the_cached_state(client):
+    client.post("/drivers", json={"x": 1, "y": 1})
+    ride = _post_ride(client, {"x": 0, "y": 0}, {"x": 5, "y": 5})
+    client.get("/state")
+    assert routes.state_json is not None
+    bad = client.post(f"/rides/{ride['id']}/respond", json={"action": "maybe", "ride_id": ride["id"]})
+    assert bad.status_code == 400
+    assert routes.state_json is not None
+
+def test_tick_moves_driver_through_pickup_and_dropoff(client):
+    client.post("/drivers", json={"x": 0, "y": 0})
+    ride = _post_ride(client, {"x": 2, "y": 1}, {"x": 2, "y": 3})
+    assert client.post(f"/rides/{ride['id']}/respond", json={"action": "accept", "ride_id": ride["id"]}).status_code == 200
+
+    def snapshot():
+        state = client.get("/state").json()
+        return state["drivers"][0], state["riders"][0], state["rides"][0]
+
+    client.post("/tick")
+    drv, rider, _ = snapshot()
+    assert drv["location"] == {"x": 1, "y": 1} and drv["status"] == "going_to_pickup"
+    client.post("/tick")
+    drv, rider, _ = snapshot()
+    assert drv["location"] == {"x": 2, "y": 1} and drv["status"] == "driving_to_dest"
+    assert rider["status"] == "in_transit"
+    client.post("/tick")
+    client.post("/tick")
+    drv, rider, ride = snapshot()
+    assert drv["location"] == {"x": 2, "y": 3} and drv["status"] == "idle"
+    assert drv["current_ride_id"] is None
+    assert rider["status"] == "completed" and ride["status"] == "completed"
+    summary = client.get("/state/summary").json()["statistics"]
+    assert summary["completed_rides"] == 1 and summary["idle_drivers"] == 1 and summary["accepted_rides"] == 0
+    # Finished rides are still listed and can no longer be responded to
+    assert client.post(f"/rides/{ride['id']}/respond", json={"action": "accept", "ride_id": ride["id"]}).status_code == 400
+
+def test_rider_status_follows_ride_creation_order_within_a_tick(client):
+    # The later ride's driver is created first, so it sits in an earlier index row
+    late_driver = client.post("/drivers", json={"x": 2, "y": 0}).json()
+    early_driver = client.post("/drivers", json={"x": 0, "y": 0}).json()
+    rider = client.post("/riders", json={"pickup_location": {"x": 0, "y": 0}, "dropoff_location": {"x": 1, "y": 0}}).json()
+    rides = []
+    for driver in (early_driver, late_driver):
+        ride = client.post("/rides", json={"rider_id": rider["id"]}).json()
+        assert ride["assigned_driver_id"] == driver["id"]
+        assert client.post(f"/rides/{ride['id']}/respond", json={"action": "accept", "ride_id": ride["id"]}).status_code == 200
+        rides.append(ride)
+
+    client.post("/tick")
+    client.post("/tick")
+    # In one tick the first ride is dropped off and the second one picks the rider up again
+    state = client.get("/state").json()
+    assert [ride["status"] for ride in state["rides"]] == ["completed", "accepted"]
+    assert {d["id"]: d["status"] for d in state["drivers"]} == {late_driver["id"]: "driving_to_dest", early_driver["id"]: "idle"}
+    assert state["riders"][0]["status"] == "in_transit"
+
+def test_rides_are_listed_in_creation_order(client):
+    client.post("/drivers", json={"x": 0, "y": 0})
+    first = _post_ride(client, {"x": 1, "y": 0}, {"x": 2, "y": 0})
+    second = _post_ride(client, {"x": 50, "y": 50}, {"x": 60, "y": 60})
+    # Finishing the first ride moves it to the history; it must stay first in the listing
+    client.post(f"/rides/{first['id']}/respond", json={"action": "accept", "ride_id": first["id"]})
+    for _ in range(3):
+        client.post("/tick")
+    ids = [ride["id"] for ride in client.get("/rides").json()]
+    assert ids == [first["id"], second["id"]]
+    assert [ride["id"] for ride in client.get("/state").json()["rides"]] == ids
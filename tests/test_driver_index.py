@@ -0,0 +1,132 @@
+import random
+
+import pytest
+
+import driver_index
+from conftest import MAX_REQUESTS, brute_force_nearest, make_fleet
+from driver_index import DriverIndex
+from helpers import pick_nearest_available
+from models import DriverState, DriverStatus, Point
+
+def check_invariants(index, drivers):
+    assert index.size == len(drivers)
+    assert sorted(index.id_to_row.values()) == list(range(index.size))
+    for driver_id, driver in drivers.items():
+        row = index.id_to_row[driver_id]
+        assert index.ids[row] == driver_id
+        assert (index.xs[row], index.ys[row]) == (driver.location.x, driver.location.y)
+        assert index.status[row] == driver.status
+        assert index.pending[row] == len(driver.pending_requests)
+        assert bool(index.moving[row]) == (driver.current_ride_id is not None)
+        if driver.current_ride_id is not None:
+            assert index.ride_ids[row] == driver.current_ride_id
+    # Rows ordered by creation sequence give back the creation order of the drivers
+    rows_by_seq = sorted(range(index.size), key=lambda row: index.seq[row])
+    assert [index.ids[row] for row in rows_by_seq] == list(drivers)
+    if index.grid is not None:
+        available = {
+            driver_id for driver_id, driver in drivers.items()
+            if driver.status == DriverStatus.IDLE and len(driver.pending_requests) < MAX_REQUESTS
+        }
+        assert set(index.grid.positions) == available
+        assert sum(len(bucket) for bucket in index.grid.cells.values()) == len(available)
+
+def test_rows_stay_consistent_across_removals():
+    rng = random.Random(7)
+    index, drivers = make_fleet(rng, 5, 100, grid_cell=10)
+    next_id = len(drivers)
+    for step in range(500):
+        op = rng.random()
+        if op < 0.3 or not drivers:
+            driver = DriverState(str(next_id), Point(rng.randrange(100), rng.randrange(100)), DriverStatus.IDLE)
+            next_id += 1
+            drivers[driver.id] = driver
+            index.add(driver)
+        elif op < 0.55:
+            driver_id = rng.choice(list(drivers))
+            del drivers[driver_id]
+            index.remove(driver_id)
+        elif op < 0.7:
+            driver = rng.choice(list(drivers.values()))
+            if driver.current_ride_id is None:
+                driver.status = DriverStatus.GOING_TO_PICKUP
+                driver.current_ride_id = f"ride-{step}"
+                index.update(driver)
+                index.set_target(driver, driver.current_ride_id, Point(rng.randrange(100), rng.randrange(100)))
+            else:
+                driver.status = DriverStatus.IDLE
+                driver.current_ride_id = None
+                index.clear_target(driver)
+                index.update(driver)
+        elif op < 0.85:
+            driver = rng.choice(list(drivers.values()))
+            if len(driver.pending_requests) < MAX_REQUESTS + 1:
+                index.add_request(driver, f"ride-{step}")
+            else:
+                index.clear_requests(driver)
+        else:
+            driver = rng.choice(list(drivers.values()))
+            driver.location.x = rng.randrange(100)
+            driver.location.y = rng.randrange(100)
+            index.update(driver)
+        check_invariants(index, drivers)
+
+@pytest.mark.parametrize("grid_cell", [10, 3, None])
+def test_nearest_matches_brute_force_including_ties(grid_cell):
+    rng = random.Random(grid_cell or 0)
+    # A small grid packs many drivers onto equal distances
+    index, drivers = make_fleet(rng, 60, 30, grid_cell)
+    for driver_id in rng.sample(list(drivers), 15):
+        del drivers[driver_id]
+        index.remove(driver_id)
+    for driver in rng.sample(list(drivers.values()), 10):
+        driver.status = DriverStatus.DRIVING_TO_DEST
+        index.update(driver)
+    for step, driver in enumerate(rng.sample(list(drivers.values()), 15)):
+        for i in range(rng.randrange(1, MAX_REQUESTS + 1)):
+            index.add_request(driver, f"ride-{step}-{i}")
+    check_invariants(index, drivers)
+
+    for _ in range(300):
+        pickup = Point(rng.randrange(30), rng.randrange(30))
+        exclude = set(rng.sample(list(drivers), rng.randrange(4)))
+        assert pick_nearest_available(index, pickup, exclude, MAX_REQUESTS) == brute_force_nearest(drivers, pickup, exclude)
+
+def test_equal_distance_goes_to_first_created_driver():
+    index = DriverIndex(grid_cell=10)
+    # Same distance from the pickup, in different cells, created in this order
+    for driver_id, (x, y) in [("a", (15, 10)), ("b", (5, 10)), ("c", (10, 15))]:
+        index.add(DriverState(driver_id, Point(x, y), DriverStatus.IDLE))
+    assert pick_nearest_available(index, Point(10, 10)) == ("a", 25)
+    index.remove("a")
+    assert pick_nearest_available(index, Point(10, 10)) == ("b", 25)
+
+@pytest.mark.parametrize("num_threads", [1, 4, 7])
+def test_chunked_kernel_matches_brute_force(monkeypatch, num_threads):
+    # The plain Python kernel, split into as many chunks as Numba would use threads
+    monkeypatch.setattr(driver_index, "NUM_THREADS", num_threads)
+    rng = random.Random(num_threads)
+    index, drivers = make_fleet(rng, 40, 20, grid_cell=None)
+    # Removals move later rows into freed slots, so row order no longer follows creation order
+    for driver_id in rng.sample(list(drivers), 10):
+        del drivers[driver_id]
+        index.remove(driver_id)
+    for step, driver in enumerate(rng.sample(list(drivers.values()), 8)):
+        index.add_request(driver, f"ride-{step}")
+    n = index.size
+
+    for _ in range(200):
+        pickup = Point(rng.randrange(20), rng.randrange(20))
+        exclude = set(rng.sample(list(drivers), rng.randrange(4)))
+        row, d2 = driver_index._nearest_idle(
+            index.xs[:n], index.ys[:n], index.status[:n], index.pending[:n], index.seq[:n],
+            index.excluded_mask(exclude), pickup.x, pickup.y, MAX_REQUESTS,
+        )
+        found = (index.ids[row], int(d2)) if row >= 0 else None
+        assert found == brute_force_nearest(drivers, pickup, exclude)
+
+def test_non_planar_metric_is_refused():
+    class LatLon:
+        planar = False
+    with pytest.raises(ValueError):
+        DriverIndex(metric=LatLon())